@@ -3,12 +3,33 @@ import numpy as np
 import tkinter as tk
 from PIL import Image, ImageTk, ImageOps
 import os
+import sys
 import time
+import gc
+import argparse
+import tempfile
+import tracemalloc
 from tkinter import font as tkFont
 
 
+class SyntheticCamera:
+    """ Stand-in for cv2.VideoCapture used by soak mode, returns a fixed test frame """
+    def __init__(self, width=640, height=480):
+        self.frame = np.random.randint(0, 256, (height, width, 3), dtype=np.uint8)
+
+    def read(self):
+        return True, self.frame.copy()
+
+    def release(self):
+        pass
+
+
 class PhotoApp:
-    def __init__(self, root):
+    # Memory guard limits - the booth runs unattended for many hours
+    MAX_OPEN_WINDOWS = 3              # preview / printing windows kept alive at once
+    NOTIFICATION_TIMEOUT_MS = 20000   # auto-dismiss printing notification after 20s
+
+    def __init__(self, root, cap=None):
         self.root = root
         self.root.title("Photo Booth")
         self.root.attributes('-fullscreen', True)  # Fullscreen mode
@@ -38,8 +59,21 @@ class PhotoApp:
                                          weight="bold")
         
         # Camera setup
-        self.cap = cv2.VideoCapture(0, cv2.CAP_V4L2)  # Force Video4Linux2
-        # use terminal command if you want list of available cameras and select wanted port
+        if cap is None:
+            cap = cv2.VideoCapture(0, cv2.CAP_V4L2)  # Force Video4Linux2
+            # use terminal command if you want list of available cameras and select wanted port
+        self.cap = cap
+        
+        # Runtime settings (soak mode overrides these)
+        self.countdown_seconds = 5
+        self.save_dir = os.path.expanduser("~/Pictures")
+        self.print_enabled = True
+        self.verbose = True
+        
+        # Memory guard state
+        self.open_windows = []     # Toplevel windows still alive, oldest first
+        self.window_timers = {}    # Pending auto-close after ids, keyed by window
+        self.preview_photo = None  # Reused PhotoImage for the live video stream
         
         # Header with title - REDUCED HEIGHT FOR SMALL SCREENS
         header_height = min(100, max(60, int(self.screen_height * 0.1)))
@@ -186,24 +220,29 @@ class PhotoApp:
                 frame_resized = cv2.resize(frame, (new_width, new_height))
                 
                 # Convert to PIL Image for display
-                img = Image.fromarray(frame_resized)
-                photo_img = ImageTk.PhotoImage(img)
-                
-                # Update the image in the label
-                self.canvas.config(image=photo_img)
-                self.canvas.image = photo_img  # Keep reference
+                self.show_frame(Image.fromarray(frame_resized))
             else:
                 # During initialization just show the frame
-                img = Image.fromarray(frame)
-                photo_img = ImageTk.PhotoImage(img)
-                self.canvas.config(image=photo_img)
-                self.canvas.image = photo_img
+                self.show_frame(Image.fromarray(frame))
                 
         # Schedule next update
         self.root.after(10, self.update_video_stream)
 
-    def start_countdown(self, count=5):
+    def show_frame(self, img):
+        """ Display a frame in the video label, reusing the PhotoImage when the size is unchanged """
+        photo_img = self.preview_photo
+        if photo_img is not None and (photo_img.width(), photo_img.height()) == img.size:
+            photo_img.paste(img)  # Update in place instead of allocating a new Tk image
+        else:
+            photo_img = ImageTk.PhotoImage(img)
+            self.canvas.config(image=photo_img)
+            self.preview_photo = photo_img
+        self.canvas.image = photo_img  # Keep reference
+
+    def start_countdown(self, count=None):
         """ Show countdown before capturing photo with animation """
+        if count is None:
+            count = self.countdown_seconds
         self.btn_capture.config(state=tk.DISABLED)  # Disable button during countdown
         
         if count > 0:
@@ -254,8 +293,9 @@ class PhotoApp:
         ret, frame = self.cap.read()
         if ret:
             frame = cv2.flip(frame, 1)  # Mirror effect
-            self.photo = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(self.photo).convert("RGBA")  # Convert to RGBA for overlay support
+            # Keep the full frame local so it is freed once the preview is built
+            photo = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            img = Image.fromarray(photo).convert("RGBA")  # Convert to RGBA for overlay support
 
             # Apply overlay if available
             if self.overlay:
@@ -281,15 +321,39 @@ class PhotoApp:
     def save_photo(self, img):
         """ Save the captured photo with overlay to the Pictures folder """
         photo_name = f"photo_{int(time.time())}.png"
-        photo_path = os.path.expanduser(f"~/Pictures/{photo_name}")  # Unique filename
+        photo_path = os.path.join(self.save_dir, photo_name)  # Unique filename
         
         img.save(photo_path)
-        print(f"Photo saved to {photo_path}")
+        if self.verbose:
+            print(f"Photo saved to {photo_path}")
         self.photo_path = photo_path  # Save the path for later use (e.g., printing)
 
+    def register_window(self, window):
+        """ Track a new Toplevel and evict the oldest ones beyond MAX_OPEN_WINDOWS """
+        self.open_windows = [w for w in self.open_windows if w.winfo_exists()]
+        self.open_windows.append(window)
+        while len(self.open_windows) > self.MAX_OPEN_WINDOWS:
+            self.close_window(self.open_windows[0])
+
+    def close_window(self, window):
+        """ Destroy a tracked window (safe to call on an already closed one) """
+        if window in self.open_windows:
+            self.open_windows.remove(window)
+        after_id = self.window_timers.pop(window, None)
+        if after_id is not None:
+            self.root.after_cancel(after_id)  # Drop the timer so it doesn't keep the window alive
+        if window.winfo_exists():
+            window.destroy()
+
+    def close_all_windows(self):
+        """ Destroy every preview / printing window, back to the main screen """
+        for window in list(self.open_windows):
+            self.close_window(window)
+
     def show_preview_window(self, img):
         """ Show a new window with the preview image and print option """
         preview_window = tk.Toplevel(self.root)
+        self.register_window(preview_window)
         preview_window.title("Preview Photo")
         preview_window.configure(bg=self.bg_color)
         
@@ -322,7 +386,7 @@ class PhotoApp:
         btn_exit = tk.Button(
             preview_header, 
             text="Return to Main", 
-            command=preview_window.destroy,
+            command=lambda: self.close_window(preview_window),
             font=("Helvetica", exit_btn_font),
             bg="#F44336",  # Red
             fg="white",
@@ -453,6 +517,7 @@ class PhotoApp:
             
             # Show printing notification
             printing_notification = tk.Toplevel(self.root)
+            self.register_window(printing_notification)
             printing_notification.title("Processing")
             printing_notification.configure(bg=self.bg_color)
             
@@ -593,14 +658,15 @@ class PhotoApp:
                 # ])
 
                 # Use lp command instead of lpr
-                subprocess.run([
-                    'lp',
-                    '-d', 'Brother-FILS',  # Use default printer
-                    '-o', 'media=A4',
-                    '-o', 'fit-to-page',  # Fit to page to ensure proper sizing
-                    '-o', 'landscape',    # Landscape orientation (lp uses this instead of orientation-requested)
-                    framed_path
-                ])
+                if self.print_enabled:
+                    subprocess.run([
+                        'lp',
+                        '-d', 'Brother-FILS',  # Use default printer
+                        '-o', 'media=A4',
+                        '-o', 'fit-to-page',  # Fit to page to ensure proper sizing
+                        '-o', 'landscape',    # Landscape orientation (lp uses this instead of orientation-requested)
+                        framed_path
+                    ])
                 
                 # Update notification to show success
                 processing_label.config(text="✅")
@@ -610,7 +676,7 @@ class PhotoApp:
                 dismiss_btn = tk.Button(
                     notification_frame,
                     text="OK",
-                    command=printing_notification.destroy,
+                    command=lambda: self.close_window(printing_notification),
                     font=("Helvetica", title_size * 4),
                     bg=self.accent_color,
                     fg="white",
@@ -629,7 +695,7 @@ class PhotoApp:
                 dismiss_btn = tk.Button(
                     notification_frame,
                     text="OK",
-                    command=printing_notification.destroy,
+                    command=lambda: self.close_window(printing_notification),
                     font=("Helvetica", title_size),
                     bg="#F44336",
                     fg="white",
@@ -638,14 +704,139 @@ class PhotoApp:
                     cursor="hand2"
                 )
                 dismiss_btn.pack(pady=20)
+            
+            # Don't leave the notification up forever if nobody taps OK
+            self.window_timers[printing_notification] = self.root.after(
+                self.NOTIFICATION_TIMEOUT_MS, self.close_window, printing_notification)
 
     def retake_photo(self, preview_window):
         """ Retake the photo by closing the preview window and starting over """
-        preview_window.destroy()  # Close the preview window
+        self.close_window(preview_window)  # Close the preview window
         self.start_countdown()  # Start the countdown again to retake the photo
 
 
+def current_rss_mb():
+    """ Resident memory of this process in MB (needs Linux /proc, as on the Pi) """
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+
+
+def run_soak(cycles, budget_mb, report_every=100, warmup=20):
+    """ Simulate capture/retake/print cycles and fail if memory grows past budget_mb """
+    if not os.path.exists("/proc/self/status"):
+        print("Soak mode needs Linux /proc to read memory usage")
+        return 2
+    
+    root = tk.Tk()
+    app = PhotoApp(root, cap=SyntheticCamera())
+    app.countdown_seconds = 0  # Capture immediately on retake
+    app.print_enabled = False  # Build the diploma but don't send it to the printer
+    app.verbose = False        # Keep the output to the periodic memory reports
+    app.NOTIFICATION_TIMEOUT_MS = 200  # Short enough for the auto-close to fire during the run
+    max_windows = 0
+    
+    def open_toplevels():
+        # Count the real windows, not the guard's own list, so an unregistered
+        # or never-destroyed Toplevel still shows up
+        return sum(isinstance(w, tk.Toplevel) for w in root.winfo_children())
+    
+    def pump():
+        nonlocal max_windows
+        root.update_idletasks()
+        root.update()
+        max_windows = max(max_windows, open_toplevels())
+    
+    def cycle(i):
+        # Unattended booth: nobody taps OK or Return to Main, windows are
+        # only closed by the memory guard (eviction and notification timeout)
+        app.capture_photo()
+        pump()
+        if i % 2:
+            # Retake: closes the preview and captures a fresh one
+            app.retake_photo(app.open_windows[-1])
+            pump()
+        if i % 3 == 0:
+            app.print_photo(app.open_windows[-1])
+            pump()
+        for name in os.listdir(app.save_dir):
+            os.remove(os.path.join(app.save_dir, name))
+    
+    with tempfile.TemporaryDirectory() as save_dir:
+        app.save_dir = save_dir
+        
+        for i in range(warmup):
+            cycle(i)
+        gc.collect()
+        tracemalloc.start()
+        baseline_rss = current_rss_mb()
+        baseline_overhead = tracemalloc.get_tracemalloc_memory()
+        baseline_snapshot = tracemalloc.take_snapshot()
+        
+        def rss_growth_mb():
+            """ RSS growth since baseline, minus tracemalloc's own bookkeeping """
+            overhead = tracemalloc.get_tracemalloc_memory() - baseline_overhead
+            return current_rss_mb() - baseline_rss - overhead / (1024 * 1024)
+        print(f"Soak: {cycles} cycles, budget {budget_mb:.1f} MB, baseline RSS {baseline_rss:.1f} MB")
+        
+        for i in range(1, cycles + 1):
+            cycle(warmup + i)
+            if i % report_every == 0 or i == cycles:
+                gc.collect()
+                traced_mb = tracemalloc.get_traced_memory()[0] / (1024 * 1024)
+                print(f"  cycle {i}: RSS {current_rss_mb():.1f} MB "
+                      f"(+{rss_growth_mb():.1f}), traced {traced_mb:.1f} MB, "
+                      f"windows {open_toplevels()} (max {max_windows})")
+        
+        gc.collect()
+        rss_growth = rss_growth_mb()
+        stats = tracemalloc.take_snapshot().compare_to(baseline_snapshot, "lineno")
+        traced_growth = sum(stat.size_diff for stat in stats) / (1024 * 1024)
+        tracemalloc.stop()
+    
+    app.close_all_windows()
+    app.cap.release()
+    root.destroy()
+    
+    print(f"Soak done: RSS growth {rss_growth:.1f} MB, Python heap growth {traced_growth:.1f} MB, "
+          f"max open windows {max_windows}")
+    failed = False
+    if max_windows > PhotoApp.MAX_OPEN_WINDOWS:
+        print(f"FAIL: {max_windows} windows open at once, limit is {PhotoApp.MAX_OPEN_WINDOWS}")
+        failed = True
+    if rss_growth > budget_mb or traced_growth > budget_mb:
+        print("FAIL: memory growth exceeded budget. Top allocations since baseline:")
+        for stat in stats[:10]:
+            print(f"  {stat}")
+        failed = True
+    if failed:
+        return 1
+    print("PASS")
+    return 0
+
+
+def positive_int(value):
+    """ argparse type for counts that must be at least 1 """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Raspberry Pi Photo Booth")
+    parser.add_argument("--soak", type=positive_int, metavar="CYCLES",
+                        help="run a memory soak test for CYCLES capture/retake/print cycles and exit")
+    parser.add_argument("--budget-mb", type=float, default=20.0,
+                        help="allowed memory growth during the soak test (default: 20)")
+    parser.add_argument("--report-every", type=positive_int, default=100,
+                        help="print memory usage every N soak cycles (default: 100)")
+    args = parser.parse_args()
+    
+    if args.soak is not None:
+        sys.exit(run_soak(args.soak, args.budget_mb, args.report_every))
+    
     root = tk.Tk()
     app = PhotoApp(root)
     root.mainloop()
\ No newline at end of file